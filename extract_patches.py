@@ -1,10 +1,14 @@
 #!/usr/bin/env python
 """Extract pacthes from a WSI or a directory of WSIs."""
 
-from typing import List
+from typing import List, Dict, Any, Optional
 
 from pathlib import Path
 
+from functools import partial
+
+from concurrent.futures import ProcessPoolExecutor
+
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, Namespace
 from argparse import BooleanOptionalAction
 
@@ -73,6 +77,13 @@ def _parse_command_line() -> Namespace:
         default=4,
     )
 
+    parser.add_argument(
+        "--slide-workers",
+        type=int,
+        help="Number of WSIs to process in parallel.",
+        default=1,
+    )
+
     parser.add_argument(
         "--mask-method",
         type=str,
@@ -101,6 +112,13 @@ def _parse_command_line() -> Namespace:
         default=2500.0,
     )
 
+    parser.add_argument(
+        "--mask-downsample",
+        type=int,
+        help="Factor to shrink the overview by before masking.",
+        default=1,
+    )
+
     parser.add_argument(
         "--zip-patches",
         type=bool,
@@ -109,6 +127,14 @@ def _parse_command_line() -> Namespace:
         action=BooleanOptionalAction,
     )
 
+    parser.add_argument(
+        "--zarr-patches",
+        type=bool,
+        help="Whether to write the patches to a single Zarr array.",
+        default=False,
+        action=BooleanOptionalAction,
+    )
+
     parser.add_argument(
         "--print-time",
         type=bool,
@@ -160,19 +186,66 @@ def _list_target_images(
         If no files are found to exist.
 
     """
-    target_wsis: List[Path] = []
+    allowed_suffixes = frozenset(file_types)
 
     if source_path.is_file():
-        target_wsis.append(source_path)
+        candidates = [source_path]
     elif source_path.is_dir():
-        target_wsis += list(source_path.glob("*"))
+        candidates = list(source_path.iterdir())
     else:
         msg = f"Target path '{source_path}' has no associated WSIs."
         raise FileNotFoundError(msg)
 
-    target_wsis = list(filter(lambda x: x.suffix in file_types, target_wsis))
+    return [path for path in candidates if path.suffix in allowed_suffixes]
+
+
+# The extractor used by the current process. It is created once per process
+# so its arguments are only processed once, not once per WSI.
+_EXTRACTOR: Optional[PatchExtractor] = None
 
-    return target_wsis
+
+def _set_up_extractor(extractor_kwargs: Dict[str, Any]):
+    """Create the ``PatchExtractor`` used by the current process.
+
+    Parameters
+    ----------
+    extractor_kwargs : Dict[str, Any]
+        Keyword arguments to instantiate the ``PatchExtractor`` with.
+
+    """
+    global _EXTRACTOR  # pylint: disable=global-statement
+    _EXTRACTOR = PatchExtractor(**extractor_kwargs)
+
+
+def _process_wsi(
+    wsi: Path,
+    save_dir: Path,
+    print_time: bool,
+    no_patches: bool,
+):
+    """Extract patches from a single WSI.
+
+    Parameters
+    ----------
+    wsi : Path
+        Path to the WSI.
+    save_dir : Path
+        Directory to save the patches in.
+    print_time : bool
+        Whether to print the processing time of the WSI.
+    no_patches : bool
+        If ``True``, only the overview images and masks are created.
+
+    """
+    if _EXTRACTOR is None:
+        raise RuntimeError("'_set_up_extractor' has not been called.")
+
+    _EXTRACTOR(
+        wsi=wsi,
+        save_dir=save_dir,
+        print_time=print_time,
+        no_patches=no_patches,
+    )
 
 
 def _extract_patches(args: Namespace):
@@ -183,30 +256,53 @@ def _extract_patches(args: Namespace):
     args : Namespace
         Command-line arguments.
 
+    Raises
+    ------
+    ValueError
+        If ``args.slide_workers`` is less than one.
+
     """
+    if args.slide_workers < 1:
+        msg = f"Slide workers should be >= 1, got '{args.slide_workers}'."
+        raise ValueError(msg)
+
     source_paths = _list_target_images(args.source_path, args.file_types)
 
-    extractor = PatchExtractor(
-        patch_size=args.patch_size,
-        stride=args.stride,
-        mpp=args.mpp,
-        overview_mpp=args.overview_mpp,
-        workers=args.workers,
-        mask_method=args.mask_method,
-        element_size=args.element_size,
-        patch_foreground=args.patch_foreground,
-        min_obj_size=args.min_obj_size,
-        zip_patches=args.zip_patches,
-    )
-
-    for source_path in source_paths:
-
-        extractor(
-            wsi=source_path,
-            save_dir=args.target_path,
-            print_time=args.print_time,
-            no_patches=not args.patches,
-        )
+    extractor_kwargs = {
+        "patch_size": args.patch_size,
+        "stride": args.stride,
+        "mpp": args.mpp,
+        "overview_mpp": args.overview_mpp,
+        "workers": args.workers,
+        "mask_method": args.mask_method,
+        "element_size": args.element_size,
+        "patch_foreground": args.patch_foreground,
+        "min_obj_size": args.min_obj_size,
+        "zip_patches": args.zip_patches,
+        "mask_downsample": args.mask_downsample,
+        "zarr_patches": args.zarr_patches,
+    }
+
+    # Fail on bad arguments before any workers are started.
+    _set_up_extractor(extractor_kwargs)
+
+    process_wsi = partial(
+        _process_wsi,
+        save_dir=args.target_path,
+        print_time=args.print_time,
+        no_patches=not args.patches,
+    )
+
+    if args.slide_workers == 1:
+        for source_path in source_paths:
+            process_wsi(source_path)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=args.slide_workers,
+            initializer=_set_up_extractor,
+            initargs=(extractor_kwargs,),
+        ) as executor:
+            list(executor.map(process_wsi, source_paths))
 
 
 if __name__ == "__main__":
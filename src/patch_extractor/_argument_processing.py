@@ -278,6 +278,38 @@ def process_min_object_size_arg(min_obj_size: float) -> float:
     return min_obj_size
 
 
+def process_mask_downsample_arg(mask_downsample: int) -> int:
+    """Process the ``mask_downsample`` argument.
+
+    Parameters
+    ----------
+    mask_downsample : int
+        Factor to shrink the overview image by before masking.
+
+    Returns
+    -------
+    mask_downsample : int
+        See Parameters.
+
+    Raises
+    ------
+    TypeError
+        If ``mask_downsample`` is not an int.
+    ValueError
+        If ``mask_downsample`` is less than one.
+
+    """
+    if not isinstance(mask_downsample, int):
+        msg = f"'mask_downsample' should be int, got {type(mask_downsample)}."
+        raise TypeError(msg)
+
+    if mask_downsample < 1:
+        msg = f"'mask_downsample' should be >= 1, got '{mask_downsample}'."
+        raise ValueError(msg)
+
+    return mask_downsample
+
+
 def process_zip_patches_arg(zip_patches: bool) -> bool:
     """Type check the ``zip_patches`` argument.
 
@@ -297,3 +329,24 @@ def process_zip_patches_arg(zip_patches: bool) -> bool:
         raise TypeError(msg)
 
     return zip_patches
+
+
+def process_zarr_patches_arg(zarr_patches: bool) -> bool:
+    """Type check the ``zarr_patches`` argument.
+
+    Parameters
+    ----------
+    zarr_patches : bool
+        Boolean arg determining whether the patches are saved in a Zarr.
+
+    Raises
+    ------
+    TypeError
+        If ``zarr_patches`` is not a bool.
+
+    """
+    if not isinstance(zarr_patches, bool):
+        msg = f"'zarr_patches' should be bool, got '{type(zarr_patches)}'."
+        raise TypeError(msg)
+
+    return zarr_patches
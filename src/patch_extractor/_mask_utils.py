@@ -2,21 +2,59 @@
 
 from typing import Callable, Dict, List
 
-from skimage.util import img_as_ubyte, img_as_float
+from functools import lru_cache, cached_property
+
+from skimage.util import img_as_ubyte
 from skimage.filters import threshold_otsu  # pylint: disable=no-name-in-module
 from skimage.color import rgb2gray, rgb2lab  # pylint: disable=no-name-in-module
-from skimage.filters.rank import entropy
-from skimage.draw import polygon2mask  # pylint: disable=no-name-in-module
 
+from scipy.ndimage import binary_fill_holes  # type: ignore
+
+from numpy import ndarray, ones, floor, ceil, log, log2, percentile, bincount
+from numpy import array, zeros, zeros_like, unique, float32, maximum, arange
+from numpy import uint8, int32, float64
+from numpy.linalg import eigh
 
-from skimage.morphology import binary_dilation, binary_erosion
-from skimage.morphology import remove_small_objects
+import cv2  # pylint: disable=import-error
 
-from scipy.ndimage import binary_fill_holes  # type: ignore
+# Optical density of each uint8 intensity, clipped to [1 / 255, 1] first.
+_OD_LUT = -log(arange(256).clip(1) / 255.0).astype(float32)
+
+
+class OverviewImage:
+    """Representations of an RGB overview image, computed on first use.
+
+    Parameters
+    ----------
+    rgb_u8 : ndarray
+        The RGB uint8 overview image.
+
+    """
+
+    def __init__(self, rgb_u8: ndarray):
+        """Set up ``OverviewImage``."""
+        self.rgb_u8 = rgb_u8
+
+    @cached_property
+    def rgb_float(self) -> ndarray:
+        """The RGB image as float32 on [0, 1]."""
+        return self.rgb_u8.astype(float32) / 255.0
 
-from sklearn.cluster import KMeans  # type: ignore
+    @cached_property
+    def rgb_chw(self) -> ndarray:
+        """The RGB image as channel-first, contiguous float32 on [0, 1]."""
+        chw_u8 = self.rgb_u8.transpose(2, 0, 1)
+        return chw_u8.astype(float32, order="C") / 255.0
 
-from numpy import ndarray, ones, floor, log, percentile, bincount, array, zeros
+    @cached_property
+    def grey_float(self) -> ndarray:
+        """The greyscale image as float32 on [0, 1]."""
+        return rgb2gray(self.rgb_float)
+
+    @cached_property
+    def grey_u8(self) -> ndarray:
+        """The greyscale image as uint8."""
+        return img_as_ubyte(self.grey_float)
 
 
 def tissue_mask_from_scratch(
@@ -25,7 +63,9 @@ def tissue_mask_from_scratch(
     overview_mpp: float,
     element_size: float,
     min_obj_size: float,
+    downsample: int = 1,
 ) -> ndarray:
+    # pylint: disable=too-many-positional-arguments,too-many-arguments
     """Create a tissue mask.
 
     Parameters
@@ -40,26 +80,133 @@ def tissue_mask_from_scratch(
         The length of the structuring element, in microns.
     min_obj_size : float
         The minimum object size, in microns, allowed in the mask.
+    downsample : int, optional
+        Factor to shrink the overview by before masking. The mask is
+        computed at the coarser resolution and scaled back up.
 
     """
-    size = int(floor(element_size / overview_mpp))
+    height, width = overview_image.shape[:2]
+
+    if downsample > 1:
+        overview_image = cv2.resize(
+            overview_image,
+            (max(width // downsample, 1), max(height // downsample, 1)),
+            interpolation=cv2.INTER_AREA,
+        )
+        overview_mpp *= downsample
+
+    size = max(int(floor(element_size / overview_mpp)), 1)
+
+    overview = OverviewImage(overview_image)
 
     if method != "entropy":
-        mask_img = mask_methods[method](overview_image)
+        mask_img = mask_methods[method](overview)
     else:
-        mask_img = mask_methods[method](overview_image, ones((size, size)))
+        mask_img = mask_methods[method](overview, size)
 
-    mask_img = binary_dilation(mask_img, footprint=ones((size, size)))
-
-    mask_img = binary_erosion(mask_img, footprint=ones((size, size)))
+    mask_img = _close_mask(mask_img, size)
 
     mask_img = binary_fill_holes(mask_img)
 
-    pixel_area = overview_mpp * overview_mpp
+    # Object areas are whole pixels, so rounding the threshold up keeps the
+    # same objects and lets it be compared as an int.
+    min_obj_px = int(ceil(min_obj_size / (overview_mpp * overview_mpp)))
+
+    mask_img = _remove_small_objects(mask_img, min_obj_px)
+
+    mask_img = img_as_ubyte(mask_img)
+
+    if downsample > 1:
+        mask_img = cv2.resize(
+            mask_img,
+            (width, height),
+            interpolation=cv2.INTER_NEAREST,
+        )
+
+    return mask_img
+
+
+def _remove_small_objects(mask: ndarray, min_size: int) -> ndarray:
+    """Remove objects smaller than ``min_size`` pixels from ``mask``.
+
+    Objects are 4-connected, as in ``skimage.morphology.remove_small_objects``.
+
+    Parameters
+    ----------
+    mask : ndarray
+        A binary mask.
+    min_size : int
+        The smallest object size, in pixels, to keep.
+
+    Returns
+    -------
+    ndarray
+        The boolean mask with the small objects removed.
+
+    """
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(
+        mask.astype(uint8),
+        connectivity=4,
+    )
+
+    keep = stats[:, cv2.CC_STAT_AREA] >= min_size
+    keep[0] = False
+
+    return keep[labels]
+
+
+def _close_mask(mask: ndarray, size: int) -> ndarray:
+    """Close ``mask`` with a square structuring element of side ``size``.
+
+    Matches skimage's ``binary_erosion(binary_dilation(mask))``, including
+    where it centres even-sized elements.
+
+    Parameters
+    ----------
+    mask : ndarray
+        The binary mask.
+    size : int
+        The length of the element, in pixels.
+
+    Returns
+    -------
+    ndarray
+        The closed mask, as bool.
+
+    """
+    kernel = _structuring_element(size)
+
+    # skimage anchors even-sized elements one pixel up and to the left when
+    # dilating, but not when eroding, so a single ``cv2.MORPH_CLOSE`` (which
+    # shares one anchor) would shift the mask by a pixel.
+    dilated = cv2.dilate(
+        mask.astype("uint8"),
+        kernel,
+        anchor=((size - 1) // 2, (size - 1) // 2),
+    )
+
+    return cv2.erode(dilated, kernel).astype(bool)
+
 
-    mask_img = remove_small_objects(mask_img, min_obj_size / pixel_area)
+@lru_cache(maxsize=8)
+def _structuring_element(size: int) -> ndarray:
+    """Return a square structuring element of side ``size``.
 
-    return img_as_ubyte(mask_img)
+    Parameters
+    ----------
+    size : int
+        The length of the element, in pixels.
+
+    Returns
+    -------
+    ndarray
+        A read-only ``(size, size)`` uint8 array of ones. The array is shared
+        between calls, so it must not be modified.
+
+    """
+    element = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+    element.setflags(write=False)
+    return element
 
 
 def tissue_mask_from_polygons(
@@ -71,6 +218,12 @@ def tissue_mask_from_polygons(
 ) -> ndarray:
     """Create a tissue mask from a predefined polygon.
 
+    The polygons are rasterised with ``cv2.fillPoly``, with their vertices
+    rounded to whole overview pixels. Pixels the boundary passes through are
+    filled, so each object has a rim up to one pixel wider than it would be
+    if only pixels whose centres are inside the polygon were kept (as
+    ``skimage.draw.polygon2mask`` does).
+
     Parameters
     ----------
     overview_height : int
@@ -93,17 +246,20 @@ def tissue_mask_from_polygons(
 
     """
     scale_factor = slide_mpp / target_mpp
-    mask = zeros((overview_height, overview_width), dtype=bool)
+    mask = zeros((overview_height, overview_width), dtype=uint8)
 
     _check_polygons_conform(polygons)
 
     for poly in polygons:
 
-        poly = poly.astype(float) * scale_factor
+        # OpenCV wants (x, y), i.e. (col, row), int32 vertices.
+        poly = (poly[:, ::-1].astype(float) * scale_factor).round()
 
-        mask = mask | polygon2mask((overview_height, overview_width), poly)
+        # Filling one polygon per call means overlapping polygons are
+        # combined with OR, rather than the even-odd rule.
+        cv2.fillPoly(mask, [poly.astype(int32)], 255)
 
-    return img_as_ubyte(mask)
+    return mask
 
 
 def _check_polygons_conform(polys: List[ndarray]):
@@ -139,12 +295,12 @@ def _check_polygons_conform(polys: List[ndarray]):
         raise ValueError(msg)
 
 
-def mask_with_otsu(overview_img: ndarray) -> ndarray:
-    """Create a tissue mask from``overview_img``.
+def mask_with_otsu(overview: OverviewImage) -> ndarray:
+    """Create a tissue mask from``overview``.
 
     Parameters
     ----------
-    overview_img : ndarray
+    overview : OverviewImage
         RGB overview image.
 
     Returns
@@ -153,17 +309,22 @@ def mask_with_otsu(overview_img: ndarray) -> ndarray:
         The binary mask image.
 
     """
-    overview_img = rgb2gray(overview_img)
+    _, mask = cv2.threshold(
+        overview.grey_u8,
+        0,
+        255,
+        cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU,
+    )
 
-    return overview_img < threshold_otsu(overview_img)
+    return mask.astype(bool)
 
 
-def mask_with_schreiber(overview_img: ndarray) -> ndarray:
-    """Create a tissue mask from ``overview_img``.
+def mask_with_schreiber(overview: OverviewImage) -> ndarray:
+    """Create a tissue mask from ``overview``.
 
     Parameters
     ----------
-    overview_img : ndarray
+    overview : OverviewImage
         The RGB overview image on a WSI.
 
     Returns
@@ -172,23 +333,25 @@ def mask_with_schreiber(overview_img: ndarray) -> ndarray:
         A binary tissue mask.
 
     """
-    overview_img = img_as_float(overview_img)
+    red, green, blue = overview.rgb_chw
+
+    representation = red - green
+    maximum(representation, 0.0, out=representation)
 
-    red = overview_img[:, :, 0]
-    green = overview_img[:, :, 1]
-    blue = overview_img[:, :, 2]
+    blue_green = blue - green
+    maximum(blue_green, 0.0, out=blue_green)
 
-    representation = (red - green).clip(0.0) * (blue - green).clip(0.0)
+    representation *= blue_green
 
     return representation > threshold_otsu(representation)
 
 
-def mask_with_optical_density(overview_img: ndarray):
-    """Create a tissue mask using the optical density of ``overview_img``.
+def mask_with_optical_density(overview: OverviewImage):
+    """Create a tissue mask using the optical density of ``overview``.
 
     Parameters
     ----------
-    overview_img : ndarray
+    overview : OverviewImage
         A low power, RGB overview of the WSI.
 
     Returns
@@ -197,24 +360,28 @@ def mask_with_optical_density(overview_img: ndarray):
         A binary tissue mask.
 
     """
-    overview_img = img_as_float(overview_img).clip(1.0 / 255.0, 1.0)
+    red, green, blue = overview.rgb_u8.transpose(2, 0, 1)
+
+    absorbance = _OD_LUT[red]
+    absorbance += _OD_LUT[green]
+    absorbance += _OD_LUT[blue]
 
-    absorbance = -log(overview_img).sum(axis=2)
+    bounds = percentile(absorbance, (1, 99)).astype(float32)
 
-    absorbance = absorbance.clip(*percentile(absorbance, (1, 99)))
+    absorbance = absorbance.clip(*bounds)
 
     return absorbance > threshold_otsu(absorbance)
 
 
-def mask_with_entropy(overview_img: ndarray, footprint: ndarray) -> ndarray:
-    """Create a tissue mask from ``overview_img``.
+def mask_with_entropy(overview: OverviewImage, size: int) -> ndarray:
+    """Create a tissue mask from ``overview``.
 
     Parameters
     ----------
-    overview_img : ndarray
+    overview : OverviewImage
         The RGB overview image on a WSI.
-    footprint : ndarray
-        The footprint to use in the entropy filter.
+    size : int
+        The length of the square footprint used in the entropy filter.
 
     Returns
     -------
@@ -222,20 +389,82 @@ def mask_with_entropy(overview_img: ndarray, footprint: ndarray) -> ndarray:
         A binary tissue mask.
 
     """
-    entropy_img = entropy(
-        img_as_ubyte(rgb2gray(overview_img)),
-        footprint=footprint,
-    )
+    entropy_img = _local_entropy(overview.grey_u8, size)
 
     return entropy_img > threshold_otsu(entropy_img)
 
 
-def mask_with_luminosity(overview_img: ndarray) -> ndarray:
-    """Create a tissue mask from ``overview_img`` using its luminosity.
+def _local_entropy(grey_img: ndarray, size: int) -> ndarray:
+    """Compute the local entropy of ``grey_img`` in a square window.
+
+    The local histogram is built one grey level at a time with integer box
+    sums, so the cost per pixel does not grow with ``size``. Pixels outside
+    the image are not counted, as in ``skimage.filters.rank.entropy``.
+
+    With ``n`` pixels in the window and ``c`` of them at a given level, the
+    entropy is ``log2(n) - sum(c * log2(c)) / n``, so each level only needs a
+    lookup of ``c * log2(c)`` rather than a division and a log.
 
     Parameters
     ----------
-    overview_img : ndarray
+    grey_img : ndarray
+        A uint8 greyscale image.
+    size : int
+        The length of the square window.
+
+    Returns
+    -------
+    ndarray
+        The local entropy, in bits.
+
+    """
+    counts = _window_sum(ones(grey_img.shape, dtype=uint8), size)
+
+    levels = arange(size * size + 1, dtype=float64)
+    c_log_c = levels * log2(levels, out=zeros_like(levels), where=levels > 0)
+    c_log_c = c_log_c.astype(float32)
+
+    weighted_sum = zeros(grey_img.shape, dtype=float32)
+    for level in unique(grey_img):
+        level_img = (grey_img == level).view(uint8)
+        weighted_sum += c_log_c[_window_sum(level_img, size)]
+
+    counts = counts.astype(float32)
+
+    return log2(counts) - weighted_sum / counts
+
+
+def _window_sum(img: ndarray, size: int) -> ndarray:
+    """Sum ``img`` over a square window, counting zero outside the image.
+
+    Parameters
+    ----------
+    img : ndarray
+        A uint8 image.
+    size : int
+        The length of the square window.
+
+    Returns
+    -------
+    ndarray
+        The int32 window sums.
+
+    """
+    return cv2.boxFilter(
+        img,
+        ddepth=cv2.CV_32S,
+        ksize=(size, size),
+        normalize=False,
+        borderType=cv2.BORDER_CONSTANT,
+    )
+
+
+def mask_with_luminosity(overview: OverviewImage) -> ndarray:
+    """Create a tissue mask from ``overview`` using its luminosity.
+
+    Parameters
+    ----------
+    overview : OverviewImage
         The RGB overview image on a WSI.
 
     Returns
@@ -244,19 +473,20 @@ def mask_with_luminosity(overview_img: ndarray) -> ndarray:
         A binary tissue mask.
 
     """
-    overview_img = img_as_float(overview_img)
-
-    lum = rgb2lab(overview_img)[:, :, 0]
+    lum = rgb2lab(overview.rgb_float)[:, :, 0]
 
     return lum < threshold_otsu(lum)
 
 
-def mask_with_kmeans(overview_img: ndarray) -> ndarray:
-    """Create a tissue mask from ``overview_img`` by clustering RGB vecs..
+def mask_with_kmeans(overview: OverviewImage) -> ndarray:
+    """Create a tissue mask from ``overview`` by clustering RGB vecs.
+
+    The RGB vectors are split in two along their principal axis, using
+    Otsu's threshold, which approximates two-cluster KMeans in one pass.
 
     Parameters
     ----------
-    overview_img : ndarray
+    overview : OverviewImage
         The RGB overview image on a WSI.
 
     Returns
@@ -265,17 +495,18 @@ def mask_with_kmeans(overview_img: ndarray) -> ndarray:
         A binary tissue mask.
 
     """
-    overview_img = img_as_float(overview_img)
+    height, width, channels = overview.rgb_u8.shape
 
-    height, width, channels = overview_img.shape
+    pixels = overview.rgb_u8.reshape(-1, channels).astype(float32)
+    pixels -= pixels.mean(axis=0)
 
-    overview_img = overview_img.reshape(-1, channels)
+    _, eig_vecs = eigh(pixels.T @ pixels)
 
-    k_means = KMeans(n_clusters=2, random_state=123)
+    projection = pixels @ eig_vecs[:, -1]
 
-    mask = k_means.fit_predict(overview_img).reshape(height, width)
+    mask = (projection > threshold_otsu(projection)).reshape(height, width)
 
-    smallest_cluster = array(bincount(mask.flatten(), minlength=2)).argmin()
+    smallest_cluster = array(bincount(mask.ravel(), minlength=2)).argmin()
 
     return mask == smallest_cluster
 
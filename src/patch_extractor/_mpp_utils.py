@@ -1,5 +1,9 @@
 """Functions for managing pixel-level scale calculations."""
 
+from typing import Optional, Tuple, NamedTuple
+
+from functools import lru_cache
+
 from pathlib import Path
 
 from tiffslide import TiffSlide
@@ -7,6 +11,90 @@ from tiffslide import TiffSlide
 from numpy import ndarray, array
 
 
+class SlideMeta(NamedTuple):
+    """Metadata of a WSI.
+
+    Parameters
+    ----------
+    mpp : float, optional
+        The microns per pixel of the slide, or ``None`` if unavailable.
+    dimensions : Tuple[int, int]
+        The (width, height) of level zero.
+    level_dimensions : Tuple[Tuple[int, int], ...]
+        The (width, height) of each level.
+    level_downsamples : Tuple[float, ...]
+        The downsample factor of each level.
+
+    """
+
+    mpp: Optional[float]
+    dimensions: Tuple[int, int]
+    level_dimensions: Tuple[Tuple[int, int], ...]
+    level_downsamples: Tuple[float, ...]
+
+
+@lru_cache(maxsize=128)
+def _read_slide_meta(
+    wsi: str,
+    mtime: float,  # pylint: disable=unused-argument
+) -> SlideMeta:
+    """Read the metadata of the slide.
+
+    The results are cached, keyed on the slide's path and modification
+    time, so each slide is only opened once.
+
+    Parameters
+    ----------
+    wsi : str
+        Path to the WSI.
+    mtime : float
+        The modification time of the WSI (only used in the cache key).
+
+    Returns
+    -------
+    SlideMeta
+        The slide's metadata.
+
+    """
+    with TiffSlide(wsi) as slide:
+
+        mpp: Optional[float] = None
+
+        if "tiffslide.mpp-x" in slide.properties:
+            mpp = float(slide.properties["tiffslide.mpp-x"])
+        elif "tiffslide.mpp-y" in slide.properties:
+            mpp = float(slide.properties["tiffslide.mpp-y"])
+
+        width, height = slide.dimensions
+
+        return SlideMeta(
+            mpp=mpp,
+            dimensions=(int(width), int(height)),
+            level_dimensions=tuple(
+                (int(level_width), int(level_height))
+                for level_width, level_height in slide.level_dimensions
+            ),
+            level_downsamples=tuple(map(float, slide.level_downsamples)),
+        )
+
+
+def get_slide_meta(wsi: Path) -> SlideMeta:
+    """Return the (cached) metadata of ``wsi``.
+
+    Parameters
+    ----------
+    wsi : Path
+        Path to the WSI.
+
+    Returns
+    -------
+    SlideMeta
+        The slide's metadata.
+
+    """
+    return _read_slide_meta(str(wsi), Path(wsi).stat().st_mtime)
+
+
 def get_slide_mpp(wsi: Path) -> float:
     """Get the microns per pixel of the slide.
 
@@ -21,16 +109,13 @@ def get_slide_mpp(wsi: Path) -> float:
         The microns per pixel of the slide.
 
     """
-    with TiffSlide(wsi) as slide:
+    mpp = get_slide_meta(wsi).mpp
 
-        if "tiffslide.mpp-x" in slide.properties:
-            return float(slide.properties["tiffslide.mpp-x"])
-
-        if "tiffslide.mpp-y" in slide.properties:
-            return float(slide.properties["tiffslide.mpp-y"])
+    if mpp is None:
+        msg = f"Unable to determine microns per pixel from slide '{wsi}'"
+        raise RuntimeError(msg)
 
-    msg = f"Unable to determine microns per pixel from slide '{wsi}'"
-    raise RuntimeError(msg)
+    return mpp
 
 
 def get_level_mpps(wsi: Path) -> ndarray:
@@ -47,11 +132,7 @@ def get_level_mpps(wsi: Path) -> ndarray:
         Microns per pixel at each level.
 
     """
-    with TiffSlide(wsi) as slide:
-
-        level_downsamples = array(slide.level_downsamples)
-
-    return get_slide_mpp(wsi) * level_downsamples
+    return get_slide_mpp(wsi) * array(get_slide_meta(wsi).level_downsamples)
 
 
 def get_nearest_level(wsi: Path, target_mpp: float) -> int:
@@ -7,9 +7,11 @@ from typing import Union, Optional, List
 
 from pathlib import Path
 
+from concurrent.futures import ThreadPoolExecutor, Future
+
 from skimage.io import imsave, imread
 
-from numpy import ndarray
+from numpy import ndarray, multiply
 
 from pandas import read_csv
 
@@ -39,7 +41,7 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
         The microns per pixel of the low-power overview image.
     workers : int, optional
         The number of workers to use, in parallel, when extracting patches
-        (has not affect on overview image or masking steps).
+        and reading the overview image (has no effect on the masking steps).
     mask_method : str, optional
         Method to use when create the tissue mask:
 
@@ -48,7 +50,7 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
           - ``"entropy"`` to use the entropy method.
           - ``"od"`` for the optical density method.
           - ``"luminosity"`` for the luminosity method.
-          - ``"kmeans"`` to use KMeans clustering on the RGB vectors.
+          - ``"kmeans"`` to split the RGB vectors into two clusters.
 
     element_size : float, optional
         The length of the square dilation, erosion and entropy element to use
@@ -66,6 +68,14 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
     zip_patches : bool, optional
         If ``True``, the patch subdirectory the patches are writtent to will
         instead be a zipfile.
+    mask_downsample : int, optional
+        Factor to shrink the overview image by before creating the tissue
+        mask. The mask is scaled back up to the overview's size afterwards.
+        Values above one trade mask detail for speed.
+    zarr_patches : bool, optional
+        If ``True``, the patches are written to a single Zarr array, in the
+        same order as the rows of the manifest csv, instead of one file per
+        patch. ``zip_patches`` is ignored if this is ``True``.
 
     """
 
@@ -82,6 +92,8 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
         patch_foreground: float = 0.5,
         min_obj_size: float = 2500.0,
         zip_patches: bool = False,
+        mask_downsample: int = 1,
+        zarr_patches: bool = False,
     ):
         """Set up ``PatchExtractor``."""
         self._patch_size = ap.process_patch_size_arg(patch_size)
@@ -94,6 +106,14 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
         self._foreground = ap.process_foreground_arg(patch_foreground)
         self._min_obj_size = ap.process_min_object_size_arg(min_obj_size)
         self._zip_patches = ap.process_zip_patches_arg(zip_patches)
+        self._mask_downsample = ap.process_mask_downsample_arg(mask_downsample)
+        self._zarr_patches = ap.process_zarr_patches_arg(zarr_patches)
+
+        # Per-slide state, set while a slide is being processed.
+        self._tissue_mask: Optional[ndarray] = None
+        self._overview_image: Optional[ndarray] = None
+        self._png_writer: Optional[ThreadPoolExecutor] = None
+        self._pending_saves: List[Future] = []
 
     _slide_path = Path("")
     _save_dir = Path("")
@@ -117,6 +137,34 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
 
         return overview_path
 
+    def _save_overview_file(self, img_name: str, image: ndarray):
+        """Save one of the overview-level images.
+
+        If a background writer is available, the PNG is encoded on it, and
+        ``image`` must not be modified afterwards.
+
+        Parameters
+        ----------
+        img_name : str
+            The name of the image: 'overview', 'masked-image', 'tissue-mask'.
+        image : ndarray
+            The image to save.
+
+        """
+        path = self._overview_file_path(img_name)
+
+        if self._png_writer is None:
+            imsave(path, image, check_contrast=False)
+        else:
+            self._pending_saves.append(
+                self._png_writer.submit(
+                    imsave,
+                    path,
+                    image,
+                    check_contrast=False,
+                )
+            )
+
     def _create_overview_image(self):
         """Create a low-power overview image of the slide."""
         requested_mpp_less_than_slide(self._slide_path, self._overview_mpp)
@@ -124,12 +172,14 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
         overview = reg_ext.extract_overview_image(
             self._slide_path,
             self._overview_mpp,
+            self._workers,
         )
 
         overview_path = self._overview_file_path("overview")
         overview_path.parent.mkdir(parents=True, exist_ok=True)
 
-        imsave(overview_path, overview, check_contrast=False)
+        self._overview_image = overview
+        self._save_overview_file("overview", overview)
 
     def _create_mask_images(self, mask_polys: Optional[List[ndarray]] = None):
         """Create an image of the tissue mask.
@@ -142,7 +192,9 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
             object, and the arrays should have shape (N, 2).
 
         """
-        overview_image = imread(self._overview_file_path("overview"))
+        overview_image = self._overview_image
+        if overview_image is None:
+            overview_image = imread(self._overview_file_path("overview"))
 
         if mask_polys is None:
 
@@ -152,6 +204,7 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
                 self._overview_mpp,
                 self._element_size,
                 self._min_obj_size,
+                self._mask_downsample,
             )
         else:
 
@@ -163,18 +216,12 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
                 target_mpp=self._overview_mpp,
             )
 
-        imsave(
-            self._overview_file_path("tissue-mask"),
-            mask,
-            check_contrast=False,
-        )
+        self._save_overview_file("tissue-mask", mask)
+        self._tissue_mask = mask
 
-        overview_image[~mask.astype(bool)] = 0
-        imsave(
-            self._overview_file_path("masked-image"),
-            overview_image,
-            check_contrast=False,
-        )
+        # A new array, as the overview may still be being written.
+        masked_image = multiply(overview_image, (mask != 0)[:, :, None])
+        self._save_overview_file("masked-image", masked_image)
 
     def _extract_patches(self, patch_csv: Optional[Path] = None):
         """Extract patches from a WSI.
@@ -199,7 +246,11 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
             mask_intersection(
                 coords,
                 self._slide_path,
-                self._overview_file_path("tissue-mask"),
+                (
+                    self._overview_file_path("tissue-mask")
+                    if self._tissue_mask is None
+                    else self._tissue_mask
+                ),
                 self._overview_mpp,
             )
 
@@ -221,6 +272,7 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
             save_dir,
             self._workers,
             self._zip_patches,
+            self._zarr_patches,
         )
 
     def __repr__(self):
@@ -284,11 +336,25 @@ class PatchExtractor:  # pylint: disable=too-many-instance-attributes
 
         self._slide_path = Path(wsi)
         self._save_dir = Path(save_dir)
+        self._tissue_mask = None
+        self._pending_saves = []
 
-        self._create_overview_image()
+        # The PNGs are encoded while the mask is computed, and finished before
+        # the patch workers are forked.
+        with ThreadPoolExecutor(max_workers=2) as png_writer:
+            self._png_writer = png_writer
 
-        if patch_csv is None:
-            self._create_mask_images(mask_polys=mask_polygons)
+            try:
+                self._create_overview_image()
+
+                if patch_csv is None:
+                    self._create_mask_images(mask_polys=mask_polygons)
+            finally:
+                self._png_writer = None
+                self._overview_image = None
+
+        for save in self._pending_saves:
+            save.result()
 
         if no_patches is False:
             self._extract_patches(patch_csv=patch_csv)
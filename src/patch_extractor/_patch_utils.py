@@ -1,26 +1,29 @@
 """Utility functions for patch-level coordinates."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Tuple, Union, Optional, Callable, Iterator
 
 from shutil import make_archive, rmtree
 
 from multiprocessing import Pool
+from multiprocessing.util import Finalize
 
 from pathlib import Path
 
-from itertools import product
-
 from tiffslide import TiffSlide
 
-from skimage.io import imread, imsave
-from skimage.util import img_as_ubyte
 from skimage.transform import resize  # pylint: disable=no-name-in-module
 
 from pandas import DataFrame
 
-from numpy import save
+import zarr  # type: ignore
+from numcodecs import Blosc  # type: ignore
+
+from numpy import save, ndarray, uint32, int64, zeros, rint, errstate
+from numpy import int32, arange, meshgrid, iinfo
+
+import cv2  # pylint: disable=import-error
 
-from ._mpp_utils import get_slide_mpp
+from ._mpp_utils import get_slide_mpp, get_slide_meta
 from .misc import is_rgb_uint8
 
 
@@ -50,27 +53,183 @@ def create_patch_coord_df(
         and 'bottom'.
 
     """
-    with TiffSlide(slide_path) as slide:
-        width, height = slide.dimensions
+    width, height = get_slide_meta(slide_path).dimensions
 
     scale = target_mpp / get_slide_mpp(slide_path)
     patch_size = round(patch_size * scale)
     stride = round(stride * scale)
 
-    coords = DataFrame(
-        columns=["left", "top"],
-        data=product(range(0, width, stride), range(0, height, stride)),
+    cols, rows = meshgrid(
+        arange(-(-width // stride), dtype=int32),
+        arange(-(-height // stride), dtype=int32),
+        indexing="ij",
+    )
+    order = _morton_keys(cols.ravel(), rows.ravel()).argsort(kind="stable")
+
+    left = cols.ravel()[order] * stride
+    top = rows.ravel()[order] * stride
+
+    return DataFrame(
+        {
+            "left": left,
+            "top": top,
+            "right": left + patch_size,
+            "bottom": top + patch_size,
+        }
     )
-    coords["right"] = coords["left"] + patch_size
-    coords["bottom"] = coords["top"] + patch_size
 
-    return coords
+
+def _part_bits(values: ndarray) -> ndarray:
+    """Spread the low 16 bits of ``values`` out to the even bit positions.
+
+    Parameters
+    ----------
+    values : ndarray
+        Non-negative integers less than 2**16.
+
+    Returns
+    -------
+    ndarray
+        The spread bits, as uint32.
+
+    """
+    values = values.astype(uint32) & 0x0000FFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    values = (values | (values << 1)) & 0x55555555
+    return values
+
+
+def _morton_keys(cols: ndarray, rows: ndarray) -> ndarray:
+    """Return the Morton (Z-order) key of each grid position.
+
+    Visiting patches in Z-order keeps consecutive patches close together
+    on the slide, so the decoded tiles they share are reused.
+
+    Parameters
+    ----------
+    cols : ndarray
+        The column index of each patch in the patch grid.
+    rows : ndarray
+        The row index of each patch in the patch grid.
+
+    Returns
+    -------
+    ndarray
+        The interleaved bits of ``cols`` and ``rows``.
+
+    """
+    return _part_bits(cols) | (_part_bits(rows) << 1)
+
+
+# Mask rows thresholded at a time while building the summed-area table.
+_SAT_BAND_ROWS = 256
+
+
+def _summed_area_table(mask: ndarray) -> ndarray:
+    """Return the summed-area table of the mask's foreground.
+
+    Parameters
+    ----------
+    mask : ndarray
+        The mask image, where non-zero pixels are foreground.
+
+    Returns
+    -------
+    ndarray
+        The foreground counts above and to the left of each pixel, padded
+        with a leading row and column of zeros so rectangle sums need no
+        edge cases.
+
+    """
+    height, width = mask.shape
+
+    # The table is memory-bound, so only widen it if the counts need it.
+    sat_dtype = int32 if height * width <= iinfo(int32).max else int64
+
+    integral = zeros((height + 1, width + 1), dtype=sat_dtype)
+
+    # Rows are summed a band at a time, so the mask is never copied whole.
+    for start in range(0, height, _SAT_BAND_ROWS):
+        stop = min(start + _SAT_BAND_ROWS, height)
+        (mask[start:stop] != 0).cumsum(
+            axis=1,
+            dtype=sat_dtype,
+            out=integral[start + 1 : stop + 1, 1:],
+        )
+
+    integral[1:, 1:].cumsum(axis=0, dtype=sat_dtype, out=integral[1:, 1:])
+
+    return integral
+
+
+def _read_mask(mask: Union[Path, ndarray]) -> ndarray:
+    """Return the mask image, reading it from disk if need be.
+
+    Parameters
+    ----------
+    mask : Path or ndarray
+        The mask image, or the path to it.
+
+    Returns
+    -------
+    ndarray
+        The mask image.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the mask image cannot be read.
+
+    """
+    if isinstance(mask, ndarray):
+        return mask
+
+    mask_img = cv2.imread(str(mask), cv2.IMREAD_GRAYSCALE)
+    if mask_img is None:
+        msg = f"Could not read mask image '{mask}'."
+        raise FileNotFoundError(msg)
+
+    return mask_img
+
+
+def _box_fractions(integral: ndarray, boxes: ndarray) -> ndarray:
+    """Return the foreground fraction of each box.
+
+    Parameters
+    ----------
+    integral : ndarray
+        The padded summed-area table of the mask.
+    boxes : ndarray
+        The (left, right, top, bottom) of each box, clipped to the mask.
+
+    Returns
+    -------
+    ndarray
+        The foreground fraction of each box, or NaN for empty boxes.
+
+    """
+    left, right, top, bottom = boxes.T
+
+    area = (right - left).clip(0) * (bottom - top).clip(0)
+
+    # One flat gather per corner, accumulated into a single result array.
+    flat, row_len = integral.ravel(), integral.shape[1]
+    top, bottom = top * row_len, bottom * row_len
+    fg_sum = flat.take(bottom + right)
+    fg_sum -= flat.take(top + right)
+    fg_sum -= flat.take(bottom + left)
+    fg_sum += flat.take(top + left)
+
+    with errstate(invalid="ignore", divide="ignore"):
+        return fg_sum / area
 
 
 def mask_intersection(
     coords: DataFrame,
     slide_path: Path,
-    mask_path: Path,
+    mask: Union[Path, ndarray],
     overview_mpp: float,
 ):
     """Added the patch-mask intersection to ``coords``.
@@ -81,80 +240,276 @@ def mask_intersection(
         Coordinate data frame.
     slide_path : Path
         Path to the WSI.
-    mask_path : Path
-        Path to the mask image.
+    mask : Path or ndarray
+        The mask image, or the path to it.
     overview_mpp : float
         The microns per pixel of the overview image.
 
     """
     scale = get_slide_mpp(slide_path) / overview_mpp
 
-    mask = imread(mask_path).astype(bool)
+    mask_img = _read_mask(mask)
+    height, width = mask_img.shape
 
-    rescaled = (coords * scale).round(0).convert_dtypes()
+    # Kept in int64: the flat indices overflow int32 for large masks.
+    boxes = coords[["left", "right", "top", "bottom"]].to_numpy() * scale
+    boxes = rint(boxes, out=boxes).astype(int64)
+    boxes[:, :2].clip(0, width, out=boxes[:, :2])
+    boxes[:, 2:].clip(0, height, out=boxes[:, 2:])
 
-    coords["mask_frac"] = rescaled.apply(
-        lambda x: mask[x.top : x.bottom, x.left : x.right].mean(), axis=1
-    )
+    coords["mask_frac"] = _box_fractions(_summed_area_table(mask_img), boxes)
 
 
-def _extract_patch(
+# Bounds on the number of patches sent to a worker at a time.
+_MAX_CHUNKSIZE = 256
+_CHUNKS_PER_WORKER = 32
+
+
+# Per-process state for the patch-extraction workers, set by ``_init_worker``.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(
     slide_path: Path,
+    save_dir: Path,
+    patch_size: int,
+    zarr_path: Optional[Path] = None,
+):
+    """Set up the current worker process.
+
+    Parameters
+    ----------
+    slide_path : Path
+        Path to the WSI, which is opened once per worker.
+    save_dir : Path
+        Directory to save the patches in.
+    patch_size : int
+        Size of the patches to save to file.
+    zarr_path : Path, optional
+        Path to the Zarr array to write the patches into, if any.
+
+    """
+    slide = TiffSlide(slide_path)
+
+    # Pool workers skip ``atexit`` handlers, but do run ``Finalize`` ones
+    # when they exit cleanly.
+    Finalize(None, slide.close, exitpriority=10)
+
+    _WORKER_STATE["slide"] = slide
+    _WORKER_STATE["file_prefix"] = f"{save_dir}/{slide_path.name}---"
+    _WORKER_STATE["patch_size"] = patch_size
+
+    if zarr_path is not None:
+        _WORKER_STATE["zarr"] = zarr.open_array(str(zarr_path), mode="r+")
+
+
+def _extract_patch(
     left: int,
     right: int,
     top: int,
     bottom: int,
-):
-    """Extract patch from the WSI.
+) -> ndarray:
+    """Extract patch from the worker's WSI.
 
     Parameters
     ----------
-    slide_path : Path
-        Path to the WSI.
     left : int
         Left patch coord.
+    right : int
+        Right patch coord.
+    top : int
+        Top patch coord.
+    bottom : int
+        Bottom patch coord.
 
+    Returns
+    -------
+    ndarray
+        The patch, read at level zero.
 
     """
-    with TiffSlide(slide_path) as slide:
-        region = slide.read_region(
-            location=(left, top),
-            level=0,
-            size=(right - left, bottom - top),
-            as_array=True,
-        )
-    return region
+    return _WORKER_STATE["slide"].read_region(
+        location=(left, top),
+        level=0,
+        size=(right - left, bottom - top),
+        as_array=True,
+    )
 
 
-def _save_patch(info: Dict[str, Any]):
-    """Save the patch to file."""
-    patch = _extract_patch(
-        slide_path=info["slide_path"],
-        left=info["left"],
-        right=info["right"],
-        top=info["top"],
-        bottom=info["bottom"],
-    )
+def _load_patch(bounds: Tuple[int, int, int, int]) -> ndarray:
+    """Extract the patch and resize it to the worker's patch size.
+
+    Parameters
+    ----------
+    bounds : Tuple[int, int, int, int]
+        The patch's (left, top, right, bottom) level-zero coords.
+
+    Returns
+    -------
+    ndarray
+        The patch. RGB patches are uint8, and any others keep the slide's
+        dtype.
+
+    """
+    left, top, right, bottom = bounds
+
+    patch = _extract_patch(left=left, right=right, top=top, bottom=bottom)
+    patch_size = _WORKER_STATE["patch_size"]
+
+    if is_rgb_uint8(patch):
+        if patch.shape[:2] == (patch_size, patch_size):
+            return patch
 
-    was_rgb_uint8 = is_rgb_uint8(patch)
+        # Area averaging when shrinking, Lanczos when enlarging.
+        shrinking = patch.shape[0] > patch_size
+        return cv2.resize(
+            patch,
+            (patch_size, patch_size),
+            interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LANCZOS4,
+        )
+
+    if patch.shape[:2] == (patch_size, patch_size):
+        return patch
 
-    patch = resize(
+    # Nearest-neighbour resizing keeps the patch's dtype.
+    return resize(
         image=patch,
-        output_shape=(info["patch_size"], info["patch_size"]),
-        order=1 if was_rgb_uint8 else 0,
+        output_shape=(patch_size, patch_size),
+        order=0,
     )
 
-    width = info["right"] - info["left"]
-    height = info["bottom"] - info["top"]
 
-    file_name = info["save_dir"]
-    # pylint: disable=line-too-long
-    file_name /= f"{info['slide_path'].name}---[x={info['left']},y={info['top']},w={width},h={height}].png"
+def _save_patch(bounds: Tuple[int, int, int, int]):
+    """Save the patch to file.
+
+    Parameters
+    ----------
+    bounds : Tuple[int, int, int, int]
+        The patch's (left, top, right, bottom) level-zero coords.
+
+    """
+    left, top, right, bottom = bounds
+
+    patch = _load_patch(bounds)
+
+    width = right - left
+    height = bottom - top
+
+    # Plain strings, as building a ``Path`` per patch adds up.
+    file_stem = _WORKER_STATE["file_prefix"]
+    file_stem += f"[x={left},y={top},w={width},h={height}]"
+
+    if is_rgb_uint8(patch):
+        file_name = f"{file_stem}.png"
 
-    if was_rgb_uint8:
-        imsave(file_name, img_as_ubyte(patch), check_contrast=False)
+        # OpenCV expects BGR, and a low deflate level keeps the encode cheap.
+        if not cv2.imwrite(
+            file_name,
+            patch[:, :, ::-1],
+            [cv2.IMWRITE_PNG_COMPRESSION, 1],
+        ):
+            raise OSError(f"Could not write patch '{file_name}'.")
     else:
-        save(file_name.with_suffix(".npy"), patch)
+        save(f"{file_stem}.npy", patch)
+
+
+def _write_zarr_patch(task: Tuple[int, int, int, int, int]):
+    """Write the patch into the worker's Zarr array.
+
+    Parameters
+    ----------
+    task : Tuple[int, int, int, int, int]
+        The patch's index in the array, followed by its (left, top, right,
+        bottom) level-zero coords.
+
+    """
+    index, *bounds = task
+
+    _WORKER_STATE["zarr"][index] = _load_patch(tuple(bounds))  # type: ignore
+
+
+def _create_zarr_store(
+    zarr_path: Path,
+    slide_path: Path,
+    num_patches: int,
+    patch_size: int,
+):
+    """Create an empty Zarr array to hold the patches.
+
+    Parameters
+    ----------
+    zarr_path : Path
+        Path to create the array at.
+    slide_path : Path
+        Path to the WSI.
+    num_patches : int
+        The number of patches.
+    patch_size : int
+        Size of the patches.
+
+    """
+    # The patches keep the slide's dtype, so probe it with a single pixel.
+    with TiffSlide(slide_path) as slide:
+        pixel = slide.read_region((0, 0), 0, (1, 1), as_array=True)
+
+    zarr.open_array(
+        str(zarr_path),
+        mode="w",
+        shape=(num_patches, patch_size, patch_size) + pixel.shape[2:],
+        chunks=(1, patch_size, patch_size) + pixel.shape[2:],
+        dtype=pixel.dtype,
+        compressor=Blosc(cname="lz4", clevel=3, shuffle=Blosc.BITSHUFFLE),
+    )
+
+
+def _patch_tasks(coords: DataFrame, indexed: bool) -> Iterator[tuple]:
+    """Return the workers' tasks for the patches in ``coords``.
+
+    Parameters
+    ----------
+    coords : DataFrame
+        Patch coords in the level-zero reference frame.
+    indexed : bool
+        If ``True``, each task starts with the patch's row number.
+
+    Returns
+    -------
+    Iterator[tuple]
+        The (left, top, right, bottom) of each patch, as plain ints.
+
+    """
+    # Plain ints, as the tasks are pickled to the workers in chunks.
+    columns = coords[["left", "top", "right", "bottom"]].to_numpy(dtype=int64)
+    bounds = columns.T.tolist()
+
+    if indexed:
+        return zip(range(len(coords)), *bounds)
+
+    return zip(*bounds)
+
+
+def _task_chunksize(num_tasks: int, workers: int) -> int:
+    """Return the number of tasks to send to a worker at a time.
+
+    Big enough to amortise the IPC, small enough to keep the workers
+    balanced. Consecutive patches are Z-ordered, so each chunk is a compact
+    block of the slide.
+
+    Parameters
+    ----------
+    num_tasks : int
+        The total number of tasks.
+    workers : int
+        The number of workers.
+
+    Returns
+    -------
+    int
+        The chunk size.
+
+    """
+    chunksize = num_tasks // (workers * _CHUNKS_PER_WORKER)
+    return min(max(chunksize, 1), _MAX_CHUNKSIZE)
 
 
 # pylint: disable=too-many-positional-arguments,too-many-arguments
@@ -165,6 +520,7 @@ def extract_patches(
     save_dir: Path,
     workers: int,
     zip_patches: bool,
+    zarr_patches: bool = False,
 ):
     """Extract patches from the WSI.
 
@@ -182,32 +538,41 @@ def extract_patches(
         The number of workers to use in the patch extraction.
     zip_patches : bool
         Should the patches be saved in a zip file or not?
+    zarr_patches : bool, optional
+        If ``True``, the patches are written to a single Zarr array at
+        ``save_dir`` with a ``.zarr`` suffix, in the order of ``coords``,
+        rather than to individual files. ``zip_patches`` is then ignored.
 
 
     """
-    coords = coords.copy()
-    coords["slide_path"] = slide_path
-    coords["patch_size"] = patch_size
-    coords["save_dir"] = save_dir
+    if zarr_patches is True:
+        zarr_path = Path(f"{save_dir}.zarr")
+        _create_zarr_store(zarr_path, slide_path, len(coords), patch_size)
+
+        save_fn: Callable = _write_zarr_patch
+    else:
+        save_dir.mkdir(exist_ok=True, parents=True)
 
-    keys = [
-        "left",
-        "right",
-        "top",
-        "bottom",
-        "slide_path",
-        "save_dir",
-        "patch_size",
-    ]
+        zarr_path = None
+        save_fn = _save_patch
 
-    save_dir.mkdir(exist_ok=True, parents=True)
+    tasks = _patch_tasks(coords, indexed=zarr_patches)
+    chunksize = _task_chunksize(len(coords), workers)
 
-    patch_info = coords[keys].apply(dict, axis=1)
+    with Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(slide_path, save_dir, patch_size, zarr_path),
+    ) as pool:
+        for _ in pool.imap_unordered(save_fn, tasks, chunksize):
+            pass
 
-    with Pool(processes=workers) as pool:
-        pool.map(_save_patch, patch_info)
+        # Let the workers exit, and run their finalizers, before the
+        # context manager terminates the pool.
+        pool.close()
+        pool.join()
 
-    if zip_patches is True:
+    if zip_patches is True and zarr_patches is False:
         make_archive(
             str(save_dir),
             "zip",
@@ -1,19 +1,198 @@
 """Utility functions for extracting regions of interest."""
 
+from typing import Optional, Tuple
+
 from pathlib import Path
 
-from numpy import ndarray
+from itertools import product
+
+from functools import partial
+
+from concurrent.futures import ThreadPoolExecutor
+
+from numpy import ndarray, float32, empty, ceil, multiply
 
 from skimage.util import img_as_ubyte
-from skimage.transform import rescale  # pylint: disable=no-name-in-module
+
+import cv2  # pylint: disable=import-error
 
 from tiffslide import TiffSlide
 
 from patch_extractor import _mpp_utils as mu
 from patch_extractor.misc import is_rgb_uint8
 
+# Length of the square tiles the overview level is read in.
+_READ_TILE_SIZE = 2048
+
+
+def _base_coord(coord: int, downsample: float) -> int:
+    """Convert a level coordinate to the level-zero one ``TiffSlide`` expects.
+
+    Parameters
+    ----------
+    coord : int
+        A pixel coordinate at the level.
+    downsample : float
+        The level's downsample factor.
+
+    Returns
+    -------
+    int
+        The level-zero coordinate which ``TiffSlide`` maps back to ``coord``.
+
+    """
+    base = int(ceil(coord * downsample))
+
+    # Guard against floating-point error in TiffSlide's int(base / downsample)
+    while int(base / downsample) < coord:
+        base += 1
+
+    return base
+
+
+def _rescale(image: ndarray, scale_factor: float) -> ndarray:
+    """Rescale ``image`` by ``scale_factor`` with OpenCV.
+
+    Parameters
+    ----------
+    image : ndarray
+        The image to rescale.
+    scale_factor : float
+        The factor to rescale the height and width by.
+
+    Returns
+    -------
+    ndarray
+        The rescaled image, with the same dtype as ``image``.
+
+    """
+    height, width = image.shape[:2]
+    size = (
+        max(round(width * scale_factor), 1),
+        max(round(height * scale_factor), 1),
+    )
+
+    # The level already has the right size, e.g. overview_mpp is a level's.
+    if size == (width, height):
+        return image
+
+    # Area averaging anti-aliases when shrinking; it is bilinear otherwise.
+    interpolation = cv2.INTER_AREA
+    if scale_factor > 1.0:
+        interpolation = cv2.INTER_LINEAR
+
+    return cv2.resize(
+        image,
+        size,
+        interpolation=interpolation,
+    )
+
 
-def extract_overview_image(wsi: Path, overview_mpp: float) -> ndarray:
+def _read_tile(
+    origin: Tuple[int, int],
+    *,
+    slide: TiffSlide,
+    level: int,
+    downsample: float,
+    width: int,
+    height: int,
+) -> Tuple[Tuple[int, int], ndarray]:
+    # pylint: disable=too-many-arguments
+    """Read the tile of ``level`` whose top-left corner is ``origin``.
+
+    Parameters
+    ----------
+    origin : Tuple[int, int]
+        The (left, top) of the tile, in the level's coordinates.
+    slide : TiffSlide
+        The open slide.
+    level : int
+        The level to read.
+    downsample : float
+        The level's downsample factor.
+    width : int
+        The width of the level.
+    height : int
+        The height of the level.
+
+    Returns
+    -------
+    Tuple[Tuple[int, int], ndarray]
+        ``origin`` and the tile, which is cropped at the level's edges.
+
+    """
+    left, top = origin
+
+    tile = slide.read_region(
+        location=(
+            _base_coord(left, downsample),
+            _base_coord(top, downsample),
+        ),
+        level=level,
+        size=(
+            min(_READ_TILE_SIZE, width - left),
+            min(_READ_TILE_SIZE, height - top),
+        ),
+        as_array=True,
+    )
+
+    return origin, tile
+
+
+def _read_level(slide: TiffSlide, level: int, workers: int) -> ndarray:
+    """Read the whole of ``level`` in tiles, using a pool of threads.
+
+    Parameters
+    ----------
+    slide : TiffSlide
+        The open slide.
+    level : int
+        The level to read.
+    workers : int
+        The number of threads to decode tiles with.
+
+    Returns
+    -------
+    ndarray
+        The full level.
+
+    """
+    width, height = slide.level_dimensions[level]
+
+    read_tile = partial(
+        _read_tile,
+        slide=slide,
+        level=level,
+        downsample=slide.level_downsamples[level],
+        width=width,
+        height=height,
+    )
+
+    origins = product(
+        range(0, width, _READ_TILE_SIZE),
+        range(0, height, _READ_TILE_SIZE),
+    )
+
+    region: Optional[ndarray] = None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for (left, top), tile in executor.map(read_tile, origins):
+
+            if region is None:
+                shape = (height, width) + tile.shape[2:]
+                region = empty(shape, dtype=tile.dtype)
+
+            tile_height, tile_width = tile.shape[:2]
+            region[top : top + tile_height, left : left + tile_width] = tile
+
+    return region  # type: ignore
+
+
+def extract_overview_image(
+    wsi: Path,
+    overview_mpp: float,
+    workers: int = 1,
+) -> ndarray:
     """Extract the full level as a numpy array.
 
     Parameters
@@ -22,6 +201,8 @@ def extract_overview_image(wsi: Path, overview_mpp: float) -> ndarray:
         Path to the WSI.
     overview_mpp : float
         The microns per pixel of the overview image.
+    workers : int, optional
+        The number of threads to read the level with.
 
     Returns
     -------
@@ -33,17 +214,19 @@ def extract_overview_image(wsi: Path, overview_mpp: float) -> ndarray:
     scale_factor = mu.get_scale_factor(wsi, overview_mpp) ** -1.0
 
     with TiffSlide(wsi) as slide:
+        region = _read_level(slide, level, workers)
+
+    if is_rgb_uint8(region):
+        return _rescale(region, scale_factor)
+
+    # Rescale a single grey channel, and only copy it to RGB at the end.
+    grey = region.mean(axis=2, dtype=float32)
+    del region
 
-        dims = slide.level_dimensions[level]
-        region = slide.read_region(
-            location=(0, 0),
-            level=level,
-            size=dims,
-            as_array=True,
-        )
+    peak = grey.max()
+    if peak > 0:
+        multiply(grey, 1.0 / peak, out=grey)
 
-    if not is_rgb_uint8(region):
-        region = region.mean(axis=2)[:, :, None].repeat(3, axis=2)
-        region /= region.max()  # type: ignore
+    grey = img_as_ubyte(_rescale(grey, scale_factor).clip(0.0, 1.0))
 
-    return img_as_ubyte(rescale(region, scale_factor, channel_axis=2))
+    return grey[:, :, None].repeat(3, axis=2)
@@ -0,0 +1,63 @@
+"""Shared fixtures for the tests."""
+
+from typing import Callable, Sequence
+
+from pathlib import Path
+
+import pytest
+
+from numpy import ndarray
+
+from tifffile import TiffWriter
+
+
+@pytest.fixture
+def write_slide(tmp_path: Path) -> Callable[..., Path]:
+    """Return a function which writes a small tiled WSI to ``tmp_path``.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Pytest's temporary directory.
+
+    Returns
+    -------
+    Callable[..., Path]
+        Writes ``image`` as level zero, with ``mpp`` microns per pixel, plus
+        one level per factor in ``downsamples``, and returns its path.
+
+    """
+
+    def _write(
+        image: ndarray,
+        mpp: float = 1.0,
+        downsamples: Sequence[int] = (),
+        name: str = "slide.tiff",
+    ) -> Path:
+        path = tmp_path / name
+        res = 1e4 / mpp
+        opts = {
+            "tile": (16, 16),
+            "photometric": "rgb" if image.shape[-1] == 3 else "minisblack",
+            "planarconfig": "contig",
+            "resolutionunit": "CENTIMETER",
+        }
+
+        with TiffWriter(path) as tif:
+            tif.write(
+                image,
+                subifds=0,
+                resolution=(res, res),
+                **opts,
+            )
+            for factor in downsamples:
+                tif.write(
+                    image[::factor, ::factor],
+                    subfiletype=1,
+                    resolution=(res / factor, res / factor),
+                    **opts,
+                )
+
+        return path
+
+    return _write
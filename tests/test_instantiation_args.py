@@ -173,3 +173,33 @@ def test_zip_patches_arg():
 
         with pytest.raises(TypeError):
             _ = PatchExtractor(zip_patches=zip_patches)
+
+
+def test_mask_downsample_arg():
+    """Test the ``mask_downsample`` argument."""
+    # Should work with ints of one or more
+    for mask_downsample in [1, 2, 4]:
+        _ = PatchExtractor(mask_downsample=mask_downsample)
+
+    # Should break with non int
+    for mask_downsample in [1.0, 2j, "Robin"]:
+        with pytest.raises(TypeError):
+            _ = PatchExtractor(mask_downsample=mask_downsample)
+
+    # Should break with ints less than one
+    for mask_downsample in [0, -1]:
+        with pytest.raises(ValueError):
+            _ = PatchExtractor(mask_downsample=mask_downsample)
+
+
+def test_zarr_patches_arg():
+    """Test the ``zarr_patches`` argument."""
+    # Should work with bool.
+    for zarr_patches in [True, False]:
+        _ = PatchExtractor(zarr_patches=zarr_patches)
+
+    # Should break with any other argument type.
+    for zarr_patches in [0, 1.0, 5j, "Alfred"]:
+
+        with pytest.raises(TypeError):
+            _ = PatchExtractor(zarr_patches=zarr_patches)
@@ -0,0 +1,117 @@
+"""Test the tissue masks created from scratch."""
+
+from numpy import full, uint8, unique, ones, allclose, bincount
+from numpy.random import default_rng
+
+import pytest
+
+from skimage.filters import threshold_otsu
+from skimage.filters.rank import entropy
+from skimage.morphology import binary_dilation, binary_erosion
+from scipy.ndimage import label  # type: ignore
+
+from patch_extractor._mask_utils import tissue_mask_from_scratch, mask_methods
+from patch_extractor._mask_utils import _local_entropy, _remove_small_objects
+from patch_extractor._mask_utils import _close_mask
+from patch_extractor._mask_utils import OverviewImage, mask_with_otsu
+
+
+def _synthetic_overview():
+    """Return a bright RGB image with a dark, pink-ish square in it."""
+    img = full((100, 120, 3), 235, dtype=uint8)
+    img[20:60, 30:90] = (180, 80, 160)
+    return img
+
+
+def test_mask_from_scratch_return_values():
+    """Test the masks returned by each of the methods."""
+    for method in mask_methods.keys():
+        mask = tissue_mask_from_scratch(
+            _synthetic_overview(),
+            method=method,
+            overview_mpp=1.0,
+            element_size=5.0,
+            min_obj_size=25.0,
+        )
+
+        assert mask.shape == (100, 120)
+        assert mask.dtype == uint8
+        assert set(unique(mask)).issubset({0, 255})
+
+        # The square is tissue and the corners are background
+        assert (mask[25:55, 35:85] == 255).all()
+        assert (mask[:10, :10] == 0).all()
+        assert (mask[-10:, -10:] == 0).all()
+
+
+# skimage >= 0.26 deprecates the binary morphology used as the reference.
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_close_mask_matches_skimage():
+    """Test ``_close_mask`` against skimage's dilation then erosion."""
+    rng = default_rng(789)
+
+    for size in range(1, 9):
+        mask = rng.random((37, 41)) > 0.7
+        footprint = ones((size, size))
+
+        expected = binary_erosion(
+            binary_dilation(mask, footprint=footprint),
+            footprint=footprint,
+        )
+
+        assert (_close_mask(mask, size) == expected).all()
+
+
+def test_local_entropy_matches_skimage():
+    """Test ``_local_entropy`` against skimage's rank entropy filter."""
+    grey = default_rng(123).integers(0, 8, size=(40, 50)).astype(uint8)
+
+    for size in [1, 4, 7]:
+        assert allclose(
+            _local_entropy(grey, size),
+            entropy(grey, footprint=ones((size, size))),
+            atol=1e-5,
+        )
+
+
+def test_remove_small_objects_return_values():
+    """Test ``_remove_small_objects`` keeps objects of at least min size."""
+    mask = default_rng(321).random((60, 70)) > 0.6
+
+    labels, _ = label(mask)
+    sizes = bincount(labels.ravel())
+
+    for min_size in [0, 2, 6, 20]:
+        expected = (sizes >= min_size)[labels] & mask
+        assert (_remove_small_objects(mask, min_size) == expected).all()
+
+
+def test_mask_with_otsu_matches_skimage():
+    """Test ``mask_with_otsu`` against skimage's ``threshold_otsu``."""
+    rng = default_rng(456)
+
+    for _ in range(5):
+        img = rng.integers(0, 256, size=(30, 40, 3)).astype(uint8)
+        img[:15] //= 3
+
+        overview = OverviewImage(img)
+        expected = overview.grey_u8 <= threshold_otsu(overview.grey_u8)
+
+        assert (mask_with_otsu(overview) == expected).all()
+
+
+def test_mask_from_scratch_downsample():
+    """Test the mask keeps the overview's shape when downsampling."""
+    for downsample in [2, 3]:
+        mask = tissue_mask_from_scratch(
+            _synthetic_overview(),
+            method="otsu",
+            overview_mpp=1.0,
+            element_size=5.0,
+            min_obj_size=25.0,
+            downsample=downsample,
+        )
+
+        assert mask.shape == (100, 120)
+        assert (mask[25:55, 35:85] == 255).all()
+        assert (mask[:10, :10] == 0).all()
@@ -88,3 +88,21 @@ def test_polygon_shapes():
             target_mpp=1.0,
             polygons=[zeros((5, 1))],
         )
+
+
+def test_overlapping_polygons():
+    """Test overlapping polygons are combined, not cancelled."""
+    mask = tissue_mask_from_polygons(
+        overview_height=30,
+        overview_width=30,
+        slide_mpp=1.0,
+        target_mpp=1.0,
+        polygons=[
+            array([(0, 0), (0, 20), (20, 20), (20, 0)]),
+            array([(10, 10), (10, 25), (25, 25), (25, 10)]),
+        ],
+    )
+
+    # The overlapping region should be foreground
+    assert (mask[10:21, 10:21] == 255).all()
+    assert (mask[26:, :] == 0).all()
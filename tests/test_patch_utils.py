@@ -0,0 +1,141 @@
+"""Test the patch-level utility functions."""
+
+from itertools import product
+
+from numpy import array, arange, meshgrid, zeros, uint8, int32, nan
+from numpy import clip, rint, isnan, isfinite, uint16, load
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+
+from pandas import DataFrame
+
+import zarr  # type: ignore
+
+from skimage.io import imsave, imread
+from skimage.transform import resize  # pylint: disable=no-name-in-module
+
+from patch_extractor._patch_utils import _morton_keys, mask_intersection
+from patch_extractor._patch_utils import extract_patches
+
+
+def test_morton_keys_return_values():
+    """Test the Z-order keys of a small grid."""
+    cols, rows = meshgrid(arange(4), arange(4))
+
+    keys = _morton_keys(cols.ravel(), rows.ravel()).reshape(4, 4)
+
+    expected = array(
+        [
+            [0, 1, 4, 5],
+            [2, 3, 6, 7],
+            [8, 9, 12, 13],
+            [10, 11, 14, 15],
+        ]
+    )
+
+    assert (keys == expected).all()
+
+
+def _brute_force_mask_frac(mask, coords, scale):
+    """Return the mean of ``mask`` over each rescaled patch, or NaN."""
+    bounds = clip(rint(coords.to_numpy() * scale), 0, None).astype(int)
+
+    fracs = []
+    for left, top, right, bottom in bounds:
+        window = mask[top:bottom, left:right]
+        fracs.append(window.mean() if window.size else nan)
+
+    return array(fracs)
+
+
+def test_mask_intersection_return_values(write_slide, tmp_path):
+    """Test the mask fractions, including edge and out-of-bounds patches."""
+    slide = write_slide(zeros((48, 64, 3), dtype=uint8), mpp=0.5)
+
+    mask = default_rng(0).random((24, 32)) > 0.6
+    mask_u8 = mask.astype(uint8) * 255
+    mask_path = tmp_path / "mask.png"
+    imsave(mask_path, mask_u8, check_contrast=False)
+
+    coords = DataFrame(
+        {
+            "left": [0, 10, 50, 70, 0, 33],
+            "top": [0, 6, 40, 0, 60, 17],
+            "right": [16, 26, 66, 86, 16, 34],
+            "bottom": [16, 22, 56, 16, 76, 18],
+        },
+        dtype=int32,
+    )
+    expected = _brute_force_mask_frac(mask, coords, 0.5)
+
+    # Patches clipped at the edge, and ones wholly outside the mask.
+    assert isfinite(expected[2]) and isnan(expected[3:5]).all()
+
+    for mask_arg in (mask, mask_u8, mask_path):
+        result = coords.copy()
+        mask_intersection(result, slide, mask_arg, overview_mpp=1.0)
+
+        assert_allclose(result.mask_frac.to_numpy(), expected)
+
+
+def test_non_rgb_patches_keep_their_dtype(write_slide, tmp_path):
+    """Test non-RGB patches are saved with the slide's dtype and values."""
+    image = default_rng(0).integers(0, 10000, (64, 64, 2), dtype=uint16)
+    slide = write_slide(image, name="fluoro.tiff")
+
+    coords = DataFrame({"left": [0, 32], "top": [0, 32]})
+    coords["right"] = coords.left + 32
+    coords["bottom"] = coords.top + 32
+
+    for patch_size in (32, 16):
+        save_dir = tmp_path / f"patches-{patch_size}"
+        extract_patches(coords, slide, patch_size, save_dir, 1, False)
+
+        for left, top, right, bottom in coords.itertuples(index=False):
+            name = f"fluoro.tiff---[x={left},y={top},w=32,h=32].npy"
+            patch = load(save_dir / name)
+
+            expected = resize(
+                image[top:bottom, left:right],
+                (patch_size, patch_size),
+                order=0,
+            )
+
+            assert patch.dtype == uint16
+            assert (patch == expected).all()
+
+
+def test_zarr_patches_match_file_patches(write_slide, tmp_path):
+    """Test the Zarr store holds the same patches as the individual files."""
+    rng = default_rng(0)
+    slides = [
+        write_slide(rng.integers(0, 256, (64, 64, 3), dtype=uint8)),
+        write_slide(
+            rng.integers(0, 10000, (64, 64, 2), dtype=uint16),
+            name="fluoro.tiff",
+        ),
+    ]
+
+    coords = DataFrame({"left": [0, 32, 16], "top": [0, 32, 0]})
+    coords["right"] = coords.left + 32
+    coords["bottom"] = coords.top + 32
+
+    for slide, patch_size in product(slides, (32, 16)):
+        save_dir = tmp_path / f"{slide.stem}-{patch_size}"
+
+        extract_patches(coords, slide, patch_size, save_dir, 2, False)
+        extract_patches(coords, slide, patch_size, save_dir, 2, False, True)
+
+        store = zarr.open_array(str(save_dir) + ".zarr", mode="r")
+        assert store.shape[:3] == (len(coords), patch_size, patch_size)
+
+        for idx, (left, top, _, _) in enumerate(coords.itertuples(False)):
+            name = f"{slide.name}---[x={left},y={top},w=32,h=32]"
+
+            if store.dtype == uint8:
+                expected = imread(save_dir / f"{name}.png")
+            else:
+                expected = load(save_dir / f"{name}.npy")
+
+            assert store.dtype == expected.dtype
+            assert (store[idx] == expected).all()
@@ -0,0 +1,65 @@
+"""Test the region-extraction utilities."""
+
+from numpy import uint8, float32
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+
+from tiffslide import TiffSlide
+
+from patch_extractor import _region_extraction as reg_ext
+from patch_extractor._region_extraction import _base_coord, _read_level
+from patch_extractor._region_extraction import _rescale
+
+
+def test_base_coord_return_values():
+    """Test level coords survive TiffSlide's round trip to level zero."""
+    for downsample in (1.0, 2.0, 3.8675213675213675, 4.000001, 15.99):
+        for coord in range(200):
+            base = _base_coord(coord, downsample)
+
+            # ``base`` maps back to ``coord``, and is the smallest that does.
+            assert int(base / downsample) == coord
+            assert base == 0 or int((base - 1) / downsample) < coord
+
+
+def test_read_level_matches_single_read(write_slide, monkeypatch):
+    """Test reading a level in tiles matches reading it in one go."""
+    image = default_rng(0).integers(0, 256, (50, 70, 3), dtype=uint8)
+    slide_path = write_slide(image, downsamples=(2, 4))
+
+    # Small tiles, so the levels span several, with partial ones at the edge.
+    monkeypatch.setattr(reg_ext, "_READ_TILE_SIZE", 16)
+
+    with TiffSlide(slide_path) as slide:
+        for level, size in enumerate(slide.level_dimensions):
+            expected = slide.read_region((0, 0), level, size, as_array=True)
+
+            for workers in (1, 3):
+                region = _read_level(slide, level, workers)
+
+                assert region.shape == expected.shape
+                assert (region == expected).all()
+
+
+def test_rescale_return_values():
+    """Test the rescaled shapes, dtypes and values."""
+    rng = default_rng(0)
+    rgb = rng.integers(0, 256, (40, 60, 3), dtype=uint8)
+    grey = rng.random((40, 60), dtype=float32)
+
+    for image in (rgb, grey):
+        # No resizing needed: the image itself is returned.
+        assert _rescale(image, 1.0) is image
+
+        expected_shapes = {0.5: (20, 30), 0.26: (10, 16), 1.5: (60, 90)}
+
+        for scale, shape in expected_shapes.items():
+            rescaled = _rescale(image, scale)
+
+            assert rescaled.shape[:2] == shape
+            assert rescaled.shape[2:] == image.shape[2:]
+            assert rescaled.dtype == image.dtype
+
+    # Halving averages each 2x2 block.
+    blocks = grey.reshape(20, 2, 30, 2).mean(axis=(1, 3))
+    assert_allclose(_rescale(grey, 0.5), blocks, rtol=1e-6)